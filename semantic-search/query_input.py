@@ -0,0 +1,18 @@
+"""
+Query Input
+
+Command-line query handling shared by semantic_query.py and its daemon client,
+semantic_query_server.py. Kept free of heavy imports (numpy, faiss, openai) so the
+thin client stays fast to start.
+"""
+
+import sys
+from typing import List, Optional
+
+def read_query_texts(texts: Optional[List[str]], file: Optional[str]) -> List[str]:
+    """Collect --text queries, plus one per stdin line for "-" or when stdin is piped without --text/--file."""
+    texts = list(texts or [])
+    if '-' in texts or (not texts and not file and not sys.stdin.isatty()):
+        texts = [text for text in texts if text != '-']
+        texts += [line.strip() for line in sys.stdin.read().splitlines() if line.strip()]
+    return texts
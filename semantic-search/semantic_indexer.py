@@ -9,39 +9,176 @@ Usage:
     python3 semantic_indexer.py --rebuild    # Full rebuild of index
     python3 semantic_indexer.py --update     # Incremental update of changed files  
     python3 semantic_indexer.py --watch      # Watch for changes and update automatically
+    python3 semantic_indexer.py --rebuild --batch-api  # Full rebuild via the (cheaper) Batch API
+    python3 semantic_indexer.py --resume-batch         # Finish an interrupted Batch API rebuild
 """
 
 import os
 import json
 import time
 import yaml
-import hashlib
 import logging
 import argparse
+import asyncio
+import threading
 import re
+import base64
 from pathlib import Path
+from types import SimpleNamespace
 from datetime import datetime
 from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import pandas as pd
 import faiss
-from openai import OpenAI
+import msgpack
+import tiktoken
+import xxhash
+from openai import OpenAI, AsyncOpenAI
 from tqdm import tqdm
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
 
-@dataclass
-class FileMetadata:
-    """Metadata for tracking file changes and embedding state"""
-    path: str
-    size: int
-    mtime: float
-    content_hash: str
-    embedding_timestamp: float
-    embedding_tokens: int
-    embedding_cost: float
+# OpenAI caps a single embeddings request at 300k tokens; stay comfortably below it
+MAX_REQUEST_TOKENS = 250000
+
+# YAML frontmatter block at the very start of a note
+FRONTMATTER_RE = re.compile(r'\A---\s*\n.*?\n---\s*\n', re.DOTALL)
+
+# Maximum number of requests in a single Batch API input file
+BATCH_API_MAX_REQUESTS = 50000
+
+def decode_embedding(embedding) -> np.ndarray:
+    """Decode an embedding requested with encoding_format="base64" into a float32 vector.
+    
+    Lists of floats (from jobs submitted without base64) are accepted too.
+    """
+    if isinstance(embedding, str):
+        return np.frombuffer(base64.b64decode(embedding), dtype=np.float32)
+    return np.asarray(embedding, dtype=np.float32)
+    
+def find_metadata_file(metadata_path: Path) -> Path:
+    """Return the metadata file to read, falling back to a legacy .json next to it."""
+    if not metadata_path.exists():
+        legacy_path = metadata_path.with_suffix('.json')
+        if legacy_path.exists():
+            return legacy_path
+    return metadata_path
+    
+def read_metadata(metadata_path: Path) -> dict:
+    """Read index metadata, written as msgpack (or as JSON by older versions)."""
+    with open(metadata_path, 'rb') as f:
+        data = f.read()
+    if data.lstrip()[:1] == b'{':
+        return json.loads(data)
+    return msgpack.unpackb(data)
+
+class FileMetadataTable:
+    """Metadata for tracking file changes and embedding state, stored column-wise.
+    
+    Each file is a row, addressed by path through `rows`. Numeric fields live in
+    numpy arrays so change detection across the whole vault is one vectorized
+    compare, and loading them is a raw buffer copy rather than a dict per file.
+    """
+    NUMERIC_COLUMNS = {
+        'size': np.int64,
+        'mtime': np.float64,
+        'embedding_timestamp': np.float64,
+        'embedding_tokens': np.int64,
+        'embedding_cost': np.float64,
+    }
+    
+    def __init__(self):
+        self.paths: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.hashes: List[str] = []
+        # Arrays are over-allocated; only the first len(self) entries are valid
+        self.columns = {name: np.empty(0, dtype=dtype) for name, dtype in self.NUMERIC_COLUMNS.items()}
+        
+    def __len__(self) -> int:
+        return len(self.paths)
+        
+    def __contains__(self, path: str) -> bool:
+        return path in self.rows
+        
+    def _reserve(self, capacity: int):
+        """Grow the numeric columns geometrically so appends stay amortized O(1)."""
+        current = len(self.columns['size'])
+        if capacity <= current:
+            return
+        new_capacity = max(capacity, current * 2, 64)
+        for name, column in self.columns.items():
+            grown = np.empty(new_capacity, dtype=column.dtype)
+            grown[:len(self)] = column[:len(self)]
+            self.columns[name] = grown
+            
+    def content_hash(self, path: str) -> Optional[str]:
+        row = self.rows.get(path)
+        return None if row is None else self.hashes[row]
+        
+    def set(self, path: str, size: int, mtime: float, content_hash: str,
+            embedding_timestamp: float, embedding_tokens: int, embedding_cost: float):
+        """Insert or replace the row for path."""
+        row = self.rows.get(path)
+        if row is None:
+            row = len(self.paths)
+            self._reserve(row + 1)
+            self.rows[path] = row
+            self.paths.append(path)
+            self.hashes.append(content_hash)
+        else:
+            self.hashes[row] = content_hash
+            
+        self.columns['size'][row] = size
+        self.columns['mtime'][row] = mtime
+        self.columns['embedding_timestamp'][row] = embedding_timestamp
+        self.columns['embedding_tokens'][row] = embedding_tokens
+        self.columns['embedding_cost'][row] = embedding_cost
+        
+    def set_stat(self, path: str, size: int, mtime: float):
+        """Record a new size/mtime for a file whose content is unchanged."""
+        row = self.rows[path]
+        self.columns['size'][row] = size
+        self.columns['mtime'][row] = mtime
+        
+    def changed(self, paths: List[str], sizes: np.ndarray, mtimes: np.ndarray) -> np.ndarray:
+        """Return a boolean mask of the paths that are new or whose size/mtime differ."""
+        rows = np.fromiter((self.rows.get(path, -1) for path in paths), dtype=np.int64, count=len(paths))
+        known = rows >= 0
+        mask = ~known
+        known_rows = rows[known]
+        mask[known] = ((self.columns['size'][known_rows] != sizes[known]) |
+                       (self.columns['mtime'][known_rows] != mtimes[known]))
+        return mask
+        
+    def to_dict(self) -> dict:
+        """Serialize as columns: lists for strings, raw little-endian buffers for numbers."""
+        data = {'path': self.paths, 'content_hash': self.hashes}
+        for name, dtype in self.NUMERIC_COLUMNS.items():
+            data[name] = self.columns[name][:len(self)].astype(np.dtype(dtype).newbyteorder('<')).tobytes()
+        return data
+        
+    @classmethod
+    def from_dict(cls, data: dict) -> 'FileMetadataTable':
+        """Load the columnar layout written by to_dict."""
+        table = cls()
+        table.paths = list(data['path'])
+        table.hashes = list(data['content_hash'])
+        table.rows = {path: row for row, path in enumerate(table.paths)}
+        for name, dtype in cls.NUMERIC_COLUMNS.items():
+            table.columns[name] = np.frombuffer(data[name], dtype=np.dtype(dtype).newbyteorder('<')).astype(dtype)
+        return table
+        
+    @classmethod
+    def from_records(cls, records: Dict[str, dict]) -> 'FileMetadataTable':
+        """Load the older one-dict-per-file layout."""
+        table = cls()
+        for path, record in records.items():
+            table.set(path, record['size'], record['mtime'], record['content_hash'],
+                      record['embedding_timestamp'], record['embedding_tokens'], record['embedding_cost'])
+        return table
 
 @dataclass 
 class IndexStats:
@@ -59,32 +196,109 @@ class IndexStats:
     def duration(self) -> float:
         return self.end_time - self.start_time
 
+class TokenBucket:
+    """Token-bucket rate limiter: bursts up to capacity, then refills at rate tokens/sec."""
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        
+    def reserve(self, tokens: float) -> float:
+        """Take tokens from the bucket, returning how long to wait before spending them."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # A request larger than the bucket could never be satisfied; cap it at a full bucket
+        self.tokens -= min(tokens, self.capacity)
+        return max(0.0, -self.tokens / self.rate)
+        
+    def consume(self, tokens: float):
+        """Block until tokens are available."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+            
+    async def acquire(self, tokens: float):
+        """Wait without blocking the event loop until tokens are available."""
+        delay = self.reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
 class SemanticIndexer:
-    def __init__(self, config_path: str = None):
-        """Initialize the semantic indexer with configuration."""
+    def __init__(self, config_path: str = None, load_existing: bool = True):
+        """Initialize the semantic indexer with configuration.
+        
+        With load_existing=False the on-disk index and metadata are not read, which
+        saves loading a large index that a full rebuild would discard anyway.
+        """
         if config_path is None:
             config_path = os.path.expanduser("~/.local/share/semantic-search/config.yaml")
         
         with open(config_path, 'r') as f:
             self.config = yaml.safe_load(f)
+            
+        # Resolve configured paths once rather than on every save/load
+        self.paths = SimpleNamespace(
+            index=Path(self.config['database']['index_path']).expanduser(),
+            metadata=Path(self.config['database']['metadata_path']).expanduser(),
+            cache=Path(self.config['database']['cache_path']).expanduser(),
+            log=Path(self.config['logging']['file']).expanduser(),
+            vault=Path(self.config['vault']['path']).expanduser()
+        )
+        
+        # Exclusion lists are checked for every file, so keep them as sets
+        self._extensions = tuple(self.config['vault']['extensions'])
+        self._exclude_dirs = frozenset(self.config['vault']['exclude_dirs'])
+        self._exclude_files = frozenset(self.config['vault'].get('exclude_files', []))
         
         self._setup_logging()
         self._setup_directories()
-        self._setup_openai()
+        
+        # Embed with the OpenAI API, or with a sentence-transformers model running locally
+        self.embedder = self.config.get('embedder', 'openai')
+        self.local_model = None
+        if self.embedder == 'local':
+            self._setup_local_model()
+        else:
+            self._setup_openai()
+        
+        # Bucket holds a minute's worth of tokens so bursts go out without pacing
+        tokens_per_minute = self.config['openai'].get('tokens_per_minute', 250000)
+        self._rate_limiter = TokenBucket(rate=tokens_per_minute / 60.0, capacity=tokens_per_minute)
+        
+        # Tokenizer for exact token counts; loaded once since its vocabulary is large, and
+        # only for OpenAI, as tiktoken downloads it on first use. A local model counts with
+        # its own tokenizer.
+        self.encoder = None
+        if self.local_model is None:
+            self.encoder = tiktoken.encoding_for_model(self.config['openai']['model'])
         
         # Initialize FAISS index and metadata tracking
         self.index = None
-        self.file_metadata: Dict[str, FileMetadata] = {}
-        self.file_paths: List[str] = []  # Maps index position to file path
-        self.dimension = 3072  # text-embedding-3-large dimension
+        self.file_metadata = FileMetadataTable()
+        # Maps FAISS vector id to file path; ids of replaced vectors map to None
+        self.file_paths: List[Optional[str]] = []
+        # Reverse of file_paths for live vectors; rebuilt on load rather than persisted
+        self._path_to_row: Dict[str, int] = {}
+        # text-embedding-3-* can return shortened vectors; 3072 is the full large-model size
+        if self.local_model is not None:
+            self.dimension = self.local_model.get_sentence_embedding_dimension()
+        else:
+            self.dimension = self.config['openai'].get('dimensions', 3072)
+        self.index_type = 'flat'
         
-        self._load_existing_data()
+        if load_existing:
+            self._load_existing_data()
+        else:
+            self._initialize_empty_index()
         
     def _setup_logging(self):
         """Setup logging configuration."""
         log_config = self.config['logging']
-        log_file = os.path.expanduser(log_config['file'])
-        os.makedirs(os.path.dirname(log_file), exist_ok=True)
+        log_file = self.paths.log
+        log_file.parent.mkdir(parents=True, exist_ok=True)
         
         logging.basicConfig(
             level=getattr(logging, log_config['level']),
@@ -99,14 +313,14 @@ class SemanticIndexer:
     def _setup_directories(self):
         """Ensure all required directories exist."""
         dirs = [
-            os.path.dirname(os.path.expanduser(self.config['database']['index_path'])),
-            os.path.dirname(os.path.expanduser(self.config['database']['metadata_path'])),
-            os.path.expanduser(self.config['database']['cache_path']),
-            os.path.dirname(os.path.expanduser(self.config['logging']['file']))
+            self.paths.index.parent,
+            self.paths.metadata.parent,
+            self.paths.cache,
+            self.paths.log.parent
         ]
         
         for directory in dirs:
-            os.makedirs(directory, exist_ok=True)
+            directory.mkdir(parents=True, exist_ok=True)
             
     def _setup_openai(self):
         """Initialize OpenAI client."""
@@ -115,30 +329,57 @@ class SemanticIndexer:
         if not api_key:
             raise ValueError("OPENAI_API_KEY environment variable is required")
         
-        self.openai_client = OpenAI(api_key=api_key)
+        # The clients retry 429s and transient errors with exponential backoff, honouring Retry-After
+        self._api_key = api_key
+        self._max_retries = self.config['openai'].get('max_retries', 5)
+        self.openai_client = OpenAI(api_key=api_key, max_retries=self._max_retries)
         self.logger.info(f"OpenAI client initialized with model: {self.config['openai']['model']}")
         
+    def _setup_local_model(self):
+        """Load the local sentence-transformers model (optional dependency)."""
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise ValueError("embedder: local requires sentence-transformers (pip install sentence-transformers)")
+            
+        local_config = self.config.get('local', {})
+        # backend: onnx/openvino (sentence-transformers >= 3.2) runs a faster, optionally quantized export
+        kwargs = {'backend': local_config['backend']} if 'backend' in local_config else {}
+        self.local_model = SentenceTransformer(local_config.get('model', 'all-MiniLM-L6-v2'), **kwargs)
+        self.openai_client = None
+        self.logger.info(f"Local embedding model loaded: {local_config.get('model', 'all-MiniLM-L6-v2')}")
+        
     def _load_existing_data(self):
         """Load existing FAISS index and metadata if available."""
-        index_path = os.path.expanduser(self.config['database']['index_path'])
-        metadata_path = os.path.expanduser(self.config['database']['metadata_path'])
+        index_path = self.paths.index
+        metadata_path = find_metadata_file(self.paths.metadata)
         
-        if os.path.exists(index_path) and os.path.exists(metadata_path):
+        if index_path.exists() and metadata_path.exists():
             try:
                 # Load FAISS index
-                self.index = faiss.read_index(index_path)
+                self.index = faiss.read_index(str(index_path))
                 self.logger.info(f"Loaded existing FAISS index with {self.index.ntotal} vectors")
+                if self.index.d != self.dimension:
+                    self.logger.warning(
+                        f"Index has {self.index.d} dimensions but config asks for {self.dimension}; "
+                        "run --rebuild before updating"
+                    )
                 
                 # Load metadata
-                with open(metadata_path, 'r') as f:
-                    metadata_dict = json.load(f)
-                    self.file_metadata = {
-                        path: FileMetadata(**data) for path, data in metadata_dict['files'].items()
-                    }
-                    self.file_paths = metadata_dict.get('file_paths', [])
-                    
+                metadata_dict = read_metadata(metadata_path)
+                if metadata_dict.get('metadata_version', 1) >= 2:
+                    self.file_metadata = FileMetadataTable.from_dict(metadata_dict['files'])
+                else:
+                    self.file_metadata = FileMetadataTable.from_records(metadata_dict['files'])
+                self.file_paths = metadata_dict.get('file_paths', [])
+                self._path_to_row = {path: row for row, path in enumerate(self.file_paths) if path is not None}
+                self.index_type = metadata_dict.get('index_type', 'flat')
+                
                 self.logger.info(f"Loaded metadata for {len(self.file_metadata)} files")
                 
+                if isinstance(self.index, faiss.IndexFlat):
+                    self._upgrade_legacy_index()
+                
             except Exception as e:
                 self.logger.warning(f"Failed to load existing data: {e}")
                 self._initialize_empty_index()
@@ -146,35 +387,169 @@ class SemanticIndexer:
             self._initialize_empty_index()
             
     def _initialize_empty_index(self):
-        """Initialize empty FAISS index and metadata."""
-        self.index = faiss.IndexFlatIP(self.dimension)  # Inner product for cosine similarity
-        self.file_metadata = {}
+        """Initialize empty FAISS index and metadata.
+        
+        Always starts flat: compressed index types need training on the full set of
+        vectors, so rebuilds convert the index in _finalize_index once it is populated.
+        """
+        # Inner product for cosine similarity; the ID map lets updated files replace their vector
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.dimension))
+        self.index_type = 'flat'
+        self.file_metadata = FileMetadataTable()
         self.file_paths = []
+        self._path_to_row = {}
         self.logger.info("Initialized empty FAISS index")
         
-    def _save_data(self):
-        """Save FAISS index and metadata to disk."""
-        index_path = os.path.expanduser(self.config['database']['index_path'])
-        metadata_path = os.path.expanduser(self.config['database']['metadata_path'])
+    def _upgrade_legacy_index(self):
+        """Wrap a bare IndexFlatIP from older versions in an IndexIDMap2.
+        
+        Vector ids become the old row positions, so file_paths keeps working as the
+        id -> path map. Older versions appended a duplicate row whenever a file was
+        re-embedded, which leaves more vectors than paths; those rows can't be
+        attributed and are only padded here.
+        """
+        num_vectors = self.index.ntotal
+        if num_vectors != len(self.file_paths):
+            self.logger.warning(
+                f"Index has {num_vectors} vectors but metadata lists {len(self.file_paths)} paths; "
+                "run --rebuild to repair stale results"
+            )
+            self.file_paths.extend([None] * (num_vectors - len(self.file_paths)))
+            
+        index = faiss.IndexIDMap2(faiss.IndexFlatIP(self.index.d))
+        index.add_with_ids(self.index.reconstruct_n(0, num_vectors), np.arange(num_vectors, dtype=np.int64))
+        self.index = index
+        self.logger.info("Upgraded flat index to support in-place updates")
+        
+        # Persist now: an update with no changed files never reaches _save_data, and
+        # queries can't map the unattributed rows until file_paths is padded on disk
+        try:
+            self._save_data()
+        except OSError as e:
+            self.logger.warning(f"Failed to save upgraded index: {e}")
+        
+    def _remove_vectors(self, ids: List[int]):
+        """Drop the vectors with the given ids and unmap them from file_paths.
+        
+        Index types that can't remove (e.g. HNSW) keep the vectors as tombstones that
+        searches skip because their id maps to None.
+        """
+        if not ids:
+            return
+            
+        for vector_id in ids:
+            del self._path_to_row[self.file_paths[vector_id]]
+            self.file_paths[vector_id] = None
+            
+        try:
+            self.index.remove_ids(np.array(ids, dtype=np.int64))
+        except RuntimeError:
+            pass
+            
+        # Warn once dead vectors are a sizeable share of the index
+        dead = self.index.ntotal - len(self._path_to_row)
+        if dead > 0.2 * self.index.ntotal:
+            self.logger.warning(
+                f"{dead} of {self.index.ntotal} index vectors are stale; run --rebuild to compact the index"
+            )
+            
+    def _target_index_type(self, num_vectors: int) -> str:
+        """Resolve the configured index type for an index holding num_vectors."""
+        index_config = self.config.get('index', {})
+        index_type = index_config.get('type', 'auto')
+        if index_type == 'auto':
+            return 'ivfpq' if num_vectors >= index_config.get('ivfpq_min_vectors', 50000) else 'flat'
+        return index_type
+        
+    def _finalize_index(self):
+        """Convert a freshly rebuilt flat index to the configured index type.
+        
+        IVFPQ stores ~32 bytes per vector instead of 4 * dimension, at a small recall
+        cost. Its coarse quantizer and codebooks are trained on all vectors at once.
+        HNSW keeps full vectors but searches a graph instead of scanning them all.
+        """
+        index_type = self._target_index_type(self.index.ntotal)
+        if index_type == 'flat':
+            return
+            
+        index_config = self.config.get('index', {})
+        
+        # Rebuilt indexes are an IndexIDMap2 over a flat index
+        vectors = self.index.index.reconstruct_n(0, self.index.ntotal)
+        ids = faiss.vector_to_array(self.index.id_map)
+        
+        if index_type == 'hnsw':
+            self.logger.info(f"Building HNSW graph over {self.index.ntotal} vectors")
+            hnsw = faiss.IndexHNSWFlat(self.dimension, index_config.get('hnsw_m', 32), faiss.METRIC_INNER_PRODUCT)
+            hnsw.hnsw.efConstruction = index_config.get('ef_construction', 40)
+            # HNSW has no ids of its own and can't remove vectors; updates leave tombstones
+            index = faiss.IndexIDMap2(hnsw)
+            index.add_with_ids(vectors, ids)
+        else:
+            factory = index_config.get('ivfpq_factory', 'OPQ32,IVF1024,PQ32')
+            # IVF indexes store ids natively
+            index = faiss.index_factory(self.dimension, factory, faiss.METRIC_INNER_PRODUCT)
+            
+            # k-means needs enough points per centroid, for the IVF lists and PQ codebooks alike
+            ivf = faiss.extract_index_ivf(index)
+            pq = getattr(ivf, 'pq', None)
+            min_vectors = 39 * max(ivf.nlist, pq.ksub if pq is not None else 0)
+            if self.index.ntotal < min_vectors:
+                self.logger.warning(
+                    f"Only {self.index.ntotal} vectors, {factory} needs at least {min_vectors} "
+                    f"to train; keeping a flat index"
+                )
+                return
+                
+            self.logger.info(f"Training {factory} index on {self.index.ntotal} vectors")
+            try:
+                index.train(vectors)
+            except RuntimeError as e:
+                # Keep the populated flat index so the embeddings are still saved
+                self.logger.warning(f"Training {factory} failed ({e}); keeping a flat index")
+                return
+            index.add_with_ids(vectors, ids)
+            faiss.extract_index_ivf(index).nprobe = index_config.get('nprobe', 16)
         
-        # Save FAISS index
-        faiss.write_index(self.index, index_path)
+        self.index = index
+        self.index_type = index_type
         
-        # Save metadata
+    def _save_data(self):
+        """Save FAISS index and metadata to disk.
+        
+        Both files are written to temp files and swapped in, metadata first: ids are never
+        reused (removed ones map to None), so a query that sees the new metadata with the
+        old index still finds every id it gets back.
+        """
         metadata_dict = {
-            'files': {path: asdict(metadata) for path, metadata in self.file_metadata.items()},
+            'metadata_version': 2,
+            'files': self.file_metadata.to_dict(),
             'file_paths': self.file_paths,
+            'index_type': self.index_type,
             'last_updated': datetime.now().isoformat()
         }
         
-        with open(metadata_path, 'w') as f:
-            json.dump(metadata_dict, f, indent=2)
-            
+        temp_path = self.paths.metadata.with_name(self.paths.metadata.name + '.tmp')
+        with open(temp_path, 'wb') as f:
+            msgpack.pack(metadata_dict, f)
+        os.replace(temp_path, self.paths.metadata)
+        
+        # Queries mmap the index, and a mapping of the old file stays valid only if it
+        # is replaced rather than rewritten
+        temp_path = self.paths.index.with_name(self.paths.index.name + '.tmp')
+        faiss.write_index(self.index, str(temp_path))
+        os.replace(temp_path, self.paths.index)
+        
         self.logger.info(f"Saved index with {self.index.ntotal} vectors and {len(self.file_metadata)} files")
         
     def _get_file_content_hash(self, content: str) -> str:
-        """Generate hash of file content for change detection."""
-        return hashlib.md5(content.encode('utf-8')).hexdigest()
+        """Generate hash of file content for change detection.
+        
+        Only used to spot changed notes, so a fast non-cryptographic hash is enough.
+        Hashes are stored as hex strings: older MD5 entries simply never match, and
+        their files are re-embedded once the next time they are touched.
+        """
+        return xxhash.xxh64(content.encode('utf-8')).hexdigest()
         
     def _extract_content(self, file_path: str) -> Optional[str]:
         """Extract and clean content from markdown file."""
@@ -183,9 +558,9 @@ class SemanticIndexer:
                 content = f.read()
                 
             # Skip frontmatter if configured
-            if self.config['indexing']['skip_frontmatter']:
+            if self.config['indexing']['skip_frontmatter'] and content.startswith('---'):
                 # Remove YAML frontmatter (between --- lines)
-                content = re.sub(r'^---\s*\n.*?\n---\s*\n', '', content, flags=re.MULTILINE | re.DOTALL)
+                content = FRONTMATTER_RE.sub('', content, count=1)
                 
             # Basic cleaning
             content = content.strip()
@@ -208,25 +583,40 @@ class SemanticIndexer:
             self.logger.error(f"Failed to read {file_path}: {e}")
             return None
             
+    def _encode_tokens(self, text: str) -> List[int]:
+        """Tokenize text with the embedding model's tokenizer."""
+        if self.local_model is not None:
+            return self.local_model.tokenizer.encode(text, add_special_tokens=False)
+        # Notes may legitimately contain text like <|endoftext|>; encode it as plain text
+        return self.encoder.encode(text, disallowed_special=())
+        
+    def _decode_tokens(self, tokens: List[int]) -> str:
+        if self.local_model is not None:
+            return self.local_model.tokenizer.decode(tokens)
+        return self.encoder.decode(tokens)
+        
+    def _max_input_tokens(self) -> int:
+        """Most tokens the embedding model reads; a local model silently drops the rest."""
+        if self.local_model is not None:
+            return self.local_model.max_seq_length - 2  # Room for the [CLS] and [SEP] tokens
+        return self.config['openai'].get('max_tokens', 8000)
+        
     def _estimate_tokens(self, text: str) -> int:
-        """Estimate token count using rough approximation (4 chars per token)."""
-        return len(text) // 4
+        """Count tokens exactly with the embedding model's tokenizer."""
+        return len(self._encode_tokens(text))
         
-    def _truncate_to_token_limit(self, text: str, max_tokens: int = 8000) -> str:
-        """Truncate text to stay within token limits, preserving sentence boundaries."""
-        estimated_tokens = self._estimate_tokens(text)
+    def _truncate_to_token_limit(self, text: str, max_tokens: int = 8000) -> Tuple[str, int]:
+        """Truncate text to stay within token limits, preserving sentence boundaries.
         
-        if estimated_tokens <= max_tokens:
-            return text
-            
-        # Conservative truncation - take roughly 80% of max to account for tokenization differences
-        target_chars = int(max_tokens * 4 * 0.8)
+        Returns the (possibly truncated) text and its token count.
+        """
+        tokens = self._encode_tokens(text)
         
-        if len(text) <= target_chars:
-            return text
+        if len(tokens) <= max_tokens:
+            return text, len(tokens)
             
-        # Truncate and try to end on sentence boundary
-        truncated = text[:target_chars]
+        # Cut at exactly max_tokens, then try to end on sentence boundary
+        truncated = self._decode_tokens(tokens[:max_tokens])
         
         # Find last sentence ending
         last_period = truncated.rfind('.')
@@ -235,95 +625,186 @@ class SemanticIndexer:
         # Use the later of period or double newline for cleaner cut
         best_cut = max(last_period, last_newline)
         
-        if best_cut > target_chars * 0.5:  # Only use if we don't lose too much
+        if best_cut > len(truncated) * 0.5:  # Only use if we don't lose too much
             truncated = truncated[:best_cut + 1]
             
-        return truncated
+        return truncated, self._estimate_tokens(truncated)
 
-    def _get_embedding(self, text: str) -> Tuple[Optional[np.ndarray], int, float]:
-        """Get embedding from OpenAI API with cost tracking and token limit handling."""
+    def _async_client(self) -> AsyncOpenAI:
+        """Create an async client for one event loop; its connections can't outlive the loop."""
+        return AsyncOpenAI(api_key=self._api_key, max_retries=self._max_retries)
+        
+    async def _get_embeddings_batch(self, client: AsyncOpenAI, semaphore: asyncio.Semaphore, texts: List[str],
+                                    token_counts: List[int]) -> Tuple[Optional[np.ndarray], List[int], List[float]]:
+        """Get embeddings for several texts in one API call, with per-text token and cost tracking."""
         try:
-            # Ensure text fits within token limits
-            max_tokens = self.config['openai'].get('max_tokens', 8000)
-            safe_text = self._truncate_to_token_limit(text, max_tokens)
-            
-            if len(safe_text) < len(text):
-                self.logger.debug(f"Truncated text from {len(text)} to {len(safe_text)} chars for token limit")
-            
-            response = self.openai_client.embeddings.create(
-                input=safe_text,
-                model=self.config['openai']['model']
-            )
+            async with semaphore:
+                # Wait only if this request would exceed the tokens-per-minute budget
+                await self._rate_limiter.acquire(sum(token_counts))
+                response = await client.embeddings.create(
+                    input=texts,
+                    model=self.config['openai']['model'],
+                    dimensions=self.dimension,
+                    encoding_format="base64"
+                )
             
-            embedding = np.array(response.data[0].embedding, dtype=np.float32)
+            # OpenAI returns one item per input, in input order; base64 decodes straight to float32
+            embeddings = np.stack([decode_embedding(item.embedding) for item in response.data])
             
-            # Normalize for cosine similarity with inner product
-            embedding = embedding / np.linalg.norm(embedding)
+            # Normalize in place for cosine similarity with inner product
+            faiss.normalize_L2(embeddings)
             
-            # Calculate cost (approximate - check OpenAI pricing)
-            tokens = response.usage.total_tokens
-            cost = tokens * 0.00013 / 1000  # $0.13 per 1M tokens for text-embedding-3-large
+            # Usage is only reported per request; per-text counts come from the tokenizer
+            tokens = list(token_counts)
+            costs = [t * 0.00013 / 1000 for t in tokens]  # $0.13 per 1M tokens for text-embedding-3-large
             
-            # Rate limiting
-            time.sleep(self.config['openai']['rate_limit_delay'])
+            return embeddings, tokens, costs
             
-            return embedding, tokens, cost
+        except Exception as e:
+            self.logger.error(f"Failed to get embeddings for batch of {len(texts)}: {e}")
+            return None, [0] * len(texts), [0.0] * len(texts)
             
+    def _get_local_embeddings(self, texts: List[str],
+                              token_counts: List[int]) -> Tuple[Optional[np.ndarray], List[int], List[float]]:
+        """Embed texts with the local model; same return shape as _get_embeddings_batch, at no cost."""
+        try:
+            embeddings = self.local_model.encode(
+                texts, normalize_embeddings=True, convert_to_numpy=True
+            ).astype(np.float32, copy=False)
+            return embeddings, list(token_counts), [0.0] * len(texts)
         except Exception as e:
-            self.logger.error(f"Failed to get embedding: {e}")
-            return None, 0, 0.0
+            self.logger.error(f"Failed to get local embeddings for batch of {len(texts)}: {e}")
+            return None, [0] * len(texts), [0.0] * len(texts)
             
-    def _should_process_file(self, file_path: str) -> bool:
-        """Determine if file needs processing based on modification time."""
+    async def _embed_requests(self, texts: List[str], token_counts: List[int],
+                              ranges: List[Tuple[int, int]]) -> list:
+        """Send one embeddings request per (start, end) range, up to max_concurrency at once."""
+        semaphore = asyncio.Semaphore(self.config['openai'].get('max_concurrency', 16))
+        async with self._async_client() as client:
+            return await asyncio.gather(*(
+                self._get_embeddings_batch(client, semaphore, texts[start:end], token_counts[start:end])
+                for start, end in ranges
+            ))
+            
+    def _files_per_batch(self) -> int:
+        """Files per _process_file_batch call: enough for max_concurrency full requests."""
+        return self.config['openai']['batch_size'] * self.config['openai'].get('max_concurrency', 16)
+        
+    def _split_into_requests(self, token_counts: List[int]) -> List[Tuple[int, int]]:
+        """Split texts, given their token counts, into (start, end) ranges that each fit in one embeddings request."""
+        max_inputs = self.config['openai']['batch_size']
+        max_tokens = min(self.config['openai'].get('tokens_per_minute', 250000), MAX_REQUEST_TOKENS)
+        
+        ranges = []
+        start = 0
+        request_tokens = 0
+        for i, tokens in enumerate(token_counts):
+            if i > start and (i - start >= max_inputs or request_tokens + tokens > max_tokens):
+                ranges.append((start, i))
+                start = i
+                request_tokens = 0
+            request_tokens += tokens
+        if start < len(token_counts):
+            ranges.append((start, len(token_counts)))
+        return ranges
+        
+    def _should_process_file(self, file_path: str, stat: Optional[os.stat_result] = None) -> bool:
+        """Determine if file needs processing based on modification time.
+        
+        Pass stat when it is already known to skip the os.stat call.
+        """
         try:
-            stat = os.stat(file_path)
+            if stat is None:
+                stat = os.stat(file_path)
             current_size = stat.st_size
             current_mtime = stat.st_mtime
             
             # Check if we have metadata for this file
-            if file_path not in self.file_metadata:
+            row = self.file_metadata.rows.get(file_path)
+            if row is None:
                 return True
                 
-            metadata = self.file_metadata[file_path]
-            
             # Check if file has changed
-            if metadata.size != current_size or metadata.mtime != current_mtime:
-                return True
-                
-            return False
+            columns = self.file_metadata.columns
+            return columns['size'][row] != current_size or columns['mtime'][row] != current_mtime
             
         except Exception as e:
             self.logger.error(f"Error checking file {file_path}: {e}")
             return True
             
-    def _find_markdown_files(self) -> List[str]:
-        """Find all markdown files in the vault."""
-        vault_path = Path(os.path.expanduser(self.config['vault']['path']))
-        extensions = self.config['vault']['extensions']
-        exclude_dirs = set(self.config['vault']['exclude_dirs'])
-        exclude_files = set(self.config['vault'].get('exclude_files', []))
+    def _find_changed_files(self, files: List[Tuple[str, os.stat_result]]) -> List[str]:
+        """Return the files that are new or whose size/mtime changed, in one vectorized compare."""
+        paths = [file_path for file_path, _ in files]
+        sizes = np.fromiter((stat.st_size for _, stat in files), dtype=np.int64, count=len(files))
+        mtimes = np.fromiter((stat.st_mtime for _, stat in files), dtype=np.float64, count=len(files))
         
+        changed = self.file_metadata.changed(paths, sizes, mtimes)
+        return [file_path for file_path, is_changed in zip(paths, changed) if is_changed]
+        
+    def _find_markdown_files(self) -> List[Tuple[str, os.stat_result]]:
+        """Find all markdown files in the vault, returning sorted (path, stat) pairs.
+        
+        Walks the vault with os.scandir: excluded directories are pruned without being
+        entered, and each file is stat'ed once here so change detection needs no
+        further os.stat calls.
+        """
+        vault_path = str(self.paths.vault)
         markdown_files = []
+        pending_dirs = [vault_path]
         
-        for ext in extensions:
-            for file_path in vault_path.rglob(f"*{ext}"):
-                # Skip if in excluded directory
-                if any(excl_dir in file_path.parts for excl_dir in exclude_dirs):
-                    continue
-                
-                # Skip if filename is in excluded files list
-                filename = file_path.name
-                if filename in exclude_files:
-                    self.logger.info(f"Skipping excluded file: {filename}")
-                    continue
-                    
-                markdown_files.append(str(file_path))
+        while pending_dirs:
+            directory = pending_dirs.pop()
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        # Skip excluded directories entirely; like rglob, don't follow symlinked ones
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in self._exclude_dirs:
+                                pending_dirs.append(entry.path)
+                            continue
+                            
+                        if not entry.name.endswith(self._extensions):
+                            continue
+                            
+                        # Skip if filename is in excluded files list
+                        if entry.name in self._exclude_files:
+                            self.logger.info(f"Skipping excluded file: {entry.name}")
+                            continue
+                            
+                        try:
+                            markdown_files.append((entry.path, entry.stat()))
+                        except OSError as e:
+                            self.logger.error(f"Error checking file {entry.path}: {e}")
+                            
+            except OSError as e:
+                self.logger.error(f"Failed to scan {directory}: {e}")
                 
         self.logger.info(f"Found {len(markdown_files)} markdown files")
-        return sorted(markdown_files)
+        markdown_files.sort(key=lambda item: item[0])
+        return markdown_files
+        
+    def _is_indexable(self, file_path: str) -> bool:
+        """Check a single path (e.g. from the file watcher) against the vault's extension and exclusion rules."""
+        path = Path(file_path)
+        if not path.name.endswith(self._extensions) or path.name in self._exclude_files:
+            return False
+        try:
+            parts = path.relative_to(self.paths.vault).parts[:-1]
+        except ValueError:
+            return False  # Outside the vault
+        return self._exclude_dirs.isdisjoint(parts)
         
-    def rebuild_index(self) -> IndexStats:
-        """Completely rebuild the index from scratch."""
+    def rebuild_index(self, use_batch_api: bool = False) -> IndexStats:
+        """Completely rebuild the index from scratch.
+        
+        With use_batch_api, embeddings are requested through the OpenAI Batch API
+        (half price, up to 24h turnaround) and the index is rebuilt once the job completes.
+        """
+        if use_batch_api:
+            if self.local_model is not None:
+                raise ValueError("--batch-api needs embedder: openai")
+            return self._rebuild_with_batch_api()
+            
         self.logger.info("Starting full index rebuild")
         stats = IndexStats(start_time=time.time())
         
@@ -331,11 +812,11 @@ class SemanticIndexer:
         self._initialize_empty_index()
         
         # Find all files
-        markdown_files = self._find_markdown_files()
+        markdown_files = [file_path for file_path, _ in self._find_markdown_files()]
         stats.total_files = len(markdown_files)
         
-        # Process files in batches for efficiency
-        batch_size = self.config['openai']['batch_size']
+        # Process files in batches large enough to keep max_concurrency requests in flight
+        batch_size = self._files_per_batch()
         
         for i in tqdm(range(0, len(markdown_files), batch_size), desc="Processing batches"):
             batch_files = markdown_files[i:i + batch_size]
@@ -349,6 +830,7 @@ class SemanticIndexer:
             stats.total_cost += batch_stats.total_cost
             
         # Save the rebuilt index
+        self._finalize_index()
         self._save_data()
         
         stats.end_time = time.time()
@@ -356,14 +838,37 @@ class SemanticIndexer:
         
         return stats
         
+    def _rebuild_with_batch_api(self) -> IndexStats:
+        """Submit every vault file as a Batch API job, then wait for and ingest the results."""
+        if self._batch_job_path().exists():
+            self.logger.info("Found a pending batch job, resuming it instead of submitting a new one")
+            return self._resume_batch()
+            
+        self.logger.info("Starting full index rebuild via the Batch API")
+        submit_stats = IndexStats()
+        markdown_files = [file_path for file_path, _ in self._find_markdown_files()]
+        paths, texts, hashes, file_stats, _ = self._collect_pending(markdown_files, True, submit_stats)
+        
+        if not paths:
+            self.logger.info("No files to embed")
+            return submit_stats
+            
+        self._submit_batch_job(dict(zip(paths, texts)), dict(zip(paths, hashes)), dict(zip(paths, file_stats)))
+        stats = self._resume_batch()
+        stats.skipped_files += submit_stats.skipped_files
+        stats.failed_files += submit_stats.failed_files
+        return stats
+        
     def update_index(self) -> IndexStats:
         """Incrementally update the index with changed files."""
         self.logger.info("Starting incremental index update")
         stats = IndexStats(start_time=time.time())
         
+        self._check_dimensions()
+        
         # Find all files and filter for changes
         markdown_files = self._find_markdown_files()
-        changed_files = [f for f in markdown_files if self._should_process_file(f)]
+        changed_files = self._find_changed_files(markdown_files)
         
         stats.total_files = len(markdown_files)
         
@@ -375,11 +880,11 @@ class SemanticIndexer:
         self.logger.info(f"Found {len(changed_files)} files to update")
         
         # Process changed files
-        batch_size = self.config['openai']['batch_size']
+        batch_size = self._files_per_batch()
         
         for i in tqdm(range(0, len(changed_files), batch_size), desc="Updating files"):
             batch_files = changed_files[i:i + batch_size]
-            batch_stats = self._process_file_batch(batch_files, force_rebuild=False)
+            batch_stats = self._process_file_batch(batch_files, force_rebuild=False, stat_checked=True)
             
             # Update stats
             stats.processed_files += batch_stats.processed_files
@@ -396,70 +901,332 @@ class SemanticIndexer:
         
         return stats
         
-    def _process_file_batch(self, files: List[str], force_rebuild: bool = False) -> IndexStats:
-        """Process a batch of files."""
+    def _check_dimensions(self):
+        """Refuse to add vectors of the configured size to an index built at another size."""
+        if self.index.d != self.dimension:
+            raise ValueError(
+                f"Index has {self.index.d} dimensions but config asks for {self.dimension}. "
+                "Run --rebuild to re-embed the vault at the new size."
+            )
+            
+    def _process_file_batch(self, files: List[str], force_rebuild: bool = False,
+                            stat_checked: bool = False) -> IndexStats:
+        """Process a batch of files, embedding all changed content with batched API calls.
+        
+        stat_checked tells us the caller already filtered files by size and mtime (as
+        update_index does with _find_changed_files), so only the content hash is checked.
+        """
         stats = IndexStats()
         
-        for file_path in files:
-            try:
-                # Check if processing is needed
-                if not force_rebuild and not self._should_process_file(file_path):
-                    stats.skipped_files += 1
-                    continue
-                    
-                # Extract content
-                content = self._extract_content(file_path)
-                if content is None:
-                    stats.skipped_files += 1
+        # Before any API call, so a stale index doesn't cost embeddings it can't take
+        self._check_dimensions()
+        
+        # First pass: read and hash files, collecting the texts that need embedding
+        pending_paths, pending_texts, pending_hashes, pending_stats, pending_tokens = self._collect_pending(
+            files, force_rebuild, stats, stat_checked
+        )
+        
+        if not pending_paths:
+            return stats
+            
+        # Second pass: embed pending texts with as few API calls as the limits allow,
+        # sent concurrently, filling rows of one preallocated matrix
+        embeddings = np.empty((len(pending_texts), self.dimension), dtype=np.float32)
+        embedded = np.zeros(len(pending_texts), dtype=bool)
+        tokens = [0] * len(pending_texts)
+        costs = [0.0] * len(pending_texts)
+        
+        ranges = self._split_into_requests(pending_tokens)
+        if self.local_model is not None:
+            responses = [self._get_local_embeddings(pending_texts[start:end], pending_tokens[start:end])
+                         for start, end in ranges]
+        else:
+            responses = asyncio.run(self._embed_requests(pending_texts, pending_tokens, ranges))
+        
+        for (start, end), (request_embeddings, request_tokens, request_costs) in zip(ranges, responses):
+            if request_embeddings is None:
+                stats.failed_files += end - start
+                continue
+                
+            embeddings[start:end] = request_embeddings
+            embedded[start:end] = True
+            tokens[start:end] = request_tokens
+            costs[start:end] = request_costs
+            
+        if not embedded.any():
+            return stats
+            
+        # Third pass: one FAISS add for everything embedded in this batch
+        if not embedded.all():
+            rows = np.flatnonzero(embedded)
+            embeddings = embeddings[embedded]
+            pending_paths = [pending_paths[i] for i in rows]
+            pending_hashes = [pending_hashes[i] for i in rows]
+            pending_stats = [pending_stats[i] for i in rows]
+            tokens = [tokens[i] for i in rows]
+            costs = [costs[i] for i in rows]
+            
+        self._store_embeddings(pending_paths, pending_hashes, embeddings, tokens, costs, stats, pending_stats)
+        
+        return stats
+        
+    def _collect_pending(self, files: List[str], force_rebuild: bool, stats: IndexStats,
+                         stat_checked: bool = False
+                         ) -> Tuple[List[str], List[str], List[str], List[Tuple[int, float]], List[int]]:
+        """Read and hash files in parallel, returning parallel lists of the paths, texts,
+        hashes, (size, mtime) stats and token counts of files needing embeddings.
+        
+        Reads overlap on a thread pool; results are consumed in input order so the
+        index stays deterministic, and all index mutation stays on this thread.
+        """
+        pending_paths: List[str] = []
+        pending_texts: List[str] = []
+        pending_hashes: List[str] = []
+        pending_stats: List[Tuple[int, float]] = []
+        pending_tokens: List[int] = []
+        
+        workers = self.config['indexing'].get('io_workers', 16)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._prepare_file, file_path, force_rebuild, stat_checked)
+                for file_path in files
+            ]
+            
+            for file_path, future in zip(files, futures):
+                try:
+                    prepared = future.result()
+                except Exception as e:
+                    self.logger.error(f"Failed to process {file_path}: {e}")
+                    stats.failed_files += 1
                     continue
                     
-                # Check if content actually changed
-                content_hash = self._get_file_content_hash(content)
-                if (not force_rebuild and file_path in self.file_metadata and 
-                    self.file_metadata[file_path].content_hash == content_hash):
+                if prepared is None:
                     stats.skipped_files += 1
                     continue
                     
-                # Get embedding
-                embedding, tokens, cost = self._get_embedding(content)
-                if embedding is None:
-                    stats.failed_files += 1
-                    continue
-                    
-                # Update or add to index
-                if file_path in self.file_metadata:
-                    # File exists, need to update
-                    old_index = self.file_paths.index(file_path)
-                    # For simplicity, we'll rebuild affected parts of index
-                    # In production, you might want more sophisticated update logic
-                    pass
-                else:
-                    # New file, add to index
-                    self.file_paths.append(file_path)
-                    
-                # Add embedding to FAISS index
-                self.index.add(embedding.reshape(1, -1))
+                _, safe_text, content_hash, stat, token_count = prepared
+                pending_paths.append(file_path)
+                pending_texts.append(safe_text)
+                pending_hashes.append(content_hash)
+                pending_stats.append((stat.st_size, stat.st_mtime))
+                pending_tokens.append(token_count)
                 
+        return pending_paths, pending_texts, pending_hashes, pending_stats, pending_tokens
+        
+    def _prepare_file(self, file_path: str, force_rebuild: bool,
+                      stat_checked: bool) -> Optional[Tuple[str, str, str, os.stat_result, int]]:
+        """Read, clean and hash one file, returning (path, text, hash, stat, tokens) or None if it needs no embedding.
+        
+        Change detection is tiered from cheapest to most expensive: a stat() comparison of
+        size and mtime (skipped when stat_checked), then a content hash for files whose stat
+        changed but whose text may not have. Unchanged files are never opened.
+        """
+        # Stat before reading: an edit in between then leaves a stale stat, which the next
+        # scan re-checks, rather than the new stat recorded against the old content
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+            
+        # Check if processing is needed (stat only, no read)
+        if not force_rebuild and not stat_checked and not self._should_process_file(file_path, stat):
+            return None
+            
+        # Extract content
+        content = self._extract_content(file_path)
+        if content is None:
+            return None
+        
+        # Check if content actually changed
+        content_hash = self._get_file_content_hash(content)
+        if not force_rebuild and self.file_metadata.content_hash(file_path) == content_hash:
+            # Touched but unchanged: record the new stat so the next scan
+            # stops at the stat check instead of re-reading the file
+            self.file_metadata.set_stat(file_path, stat.st_size, stat.st_mtime)
+            return None
+            
+        # Ensure text fits within token limits
+        safe_text, token_count = self._truncate_to_token_limit(content, self._max_input_tokens())
+        if len(safe_text) < len(content):
+            self.logger.debug(f"Truncated {file_path} from {len(content)} to {len(safe_text)} chars for token limit")
+            
+        return file_path, safe_text, content_hash, stat, token_count
+        
+    def _store_embeddings(self, paths: List[str], hashes: List[str], embeddings: np.ndarray,
+                          tokens: List[int], costs: List[float], stats: IndexStats,
+                          file_stats: List[Tuple[int, float]]):
+        """Add normalized embeddings to the index and record metadata for their files.
+        
+        file_stats holds each file's (size, mtime) as of when its text was read, so
+        edits made while embeddings were in flight are picked up by the next update.
+        """
+        # Files being re-embedded give up their old vector
+        stale_ids = [self._path_to_row[file_path] for file_path in paths if file_path in self._path_to_row]
+        self._remove_vectors(stale_ids)
+        
+        # Add the whole batch of embeddings to FAISS in one call, under fresh ids
+        first_id = len(self.file_paths)
+        self.index.add_with_ids(embeddings, np.arange(first_id, first_id + len(paths), dtype=np.int64))
+        self.file_paths.extend(paths)
+        self._path_to_row.update(zip(paths, range(first_id, first_id + len(paths))))
+        
+        for i, file_path in enumerate(paths):
+            try:
                 # Update metadata
-                stat = os.stat(file_path)
-                self.file_metadata[file_path] = FileMetadata(
-                    path=file_path,
-                    size=stat.st_size,
-                    mtime=stat.st_mtime,
-                    content_hash=content_hash,
-                    embedding_timestamp=time.time(),
-                    embedding_tokens=tokens,
-                    embedding_cost=cost
-                )
+                size, mtime = file_stats[i]
+                self.file_metadata.set(file_path, size, mtime, hashes[i], time.time(), tokens[i], costs[i])
                 
                 stats.processed_files += 1
-                stats.total_tokens += tokens
-                stats.total_cost += cost
+                stats.total_tokens += tokens[i]
+                stats.total_cost += costs[i]
                 
             except Exception as e:
                 self.logger.error(f"Failed to process {file_path}: {e}")
                 stats.failed_files += 1
                 
+    def _batch_job_path(self) -> Path:
+        """Location of the persisted state for an in-flight Batch API job."""
+        return self.paths.cache / 'batch_job.json'
+        
+    def _submit_batch_job(self, file_texts: Dict[str, str], file_hashes: Dict[str, str],
+                          file_stats: Dict[str, Tuple[int, float]]) -> str:
+        """Submit embeddings for all files as one OpenAI Batch API job and persist its state."""
+        if len(file_texts) > BATCH_API_MAX_REQUESTS:
+            raise ValueError(f"Batch API jobs are limited to {BATCH_API_MAX_REQUESTS} requests, "
+                             f"got {len(file_texts)} files")
+            
+        model = self.config['openai']['model']
+        paths = list(file_texts)
+        
+        # One embeddings request per file; custom_id maps each result line back to its path
+        lines = []
+        for i, file_path in enumerate(paths):
+            lines.append(json.dumps({
+                'custom_id': f"file-{i}",
+                'method': 'POST',
+                'url': '/v1/embeddings',
+                'body': {'model': model, 'input': file_texts[file_path],
+                         'dimensions': self.dimension, 'encoding_format': 'base64'}
+            }))
+        
+        batch_input = '\n'.join(lines).encode('utf-8')
+        input_file = self.openai_client.files.create(
+            file=('embeddings_batch.jsonl', batch_input),
+            purpose='batch'
+        )
+        batch = self.openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint='/v1/embeddings',
+            completion_window='24h'
+        )
+        
+        # Record what each custom_id refers to, including the stat at read time so a
+        # later --update picks up edits made while the job was running
+        files = {}
+        for i, file_path in enumerate(paths):
+            size, mtime = file_stats[file_path]
+            files[f"file-{i}"] = {
+                'path': file_path,
+                'content_hash': file_hashes[file_path],
+                'size': size,
+                'mtime': mtime
+            }
+            
+        with open(self._batch_job_path(), 'w') as f:
+            json.dump({
+                'batch_id': batch.id,
+                'input_file_id': input_file.id,
+                'submitted_at': datetime.now().isoformat(),
+                'files': files
+            }, f, indent=2)
+            
+        self.logger.info(f"Submitted batch job {batch.id} with {len(paths)} embedding requests")
+        return batch.id
+        
+    def _resume_batch(self) -> IndexStats:
+        """Wait for the persisted Batch API job to finish, then rebuild the index from its results."""
+        stats = IndexStats(start_time=time.time())
+        job_path = self._batch_job_path()
+        
+        if not job_path.exists():
+            raise FileNotFoundError("No pending batch job. Run with --rebuild --batch-api first.")
+        if self.local_model is not None:
+            raise ValueError("--resume-batch needs embedder: openai")
+            
+        with open(job_path, 'r') as f:
+            job = json.load(f)
+            
+        # Poll with exponential backoff; jobs can take anywhere from minutes to 24h
+        delay = 30
+        while True:
+            batch = self.openai_client.batches.retrieve(job['batch_id'])
+            if batch.status == 'completed':
+                break
+            if batch.status in ('failed', 'expired', 'cancelling', 'cancelled'):
+                raise RuntimeError(f"Batch job {job['batch_id']} ended with status '{batch.status}'")
+                
+            self.logger.info(f"Batch job {job['batch_id']} is {batch.status}, checking again in {delay}s")
+            time.sleep(delay)
+            delay = min(delay * 2, 600)
+            
+        # Requests that errored outright are reported in a separate error file, not the output
+        error_count = 0
+        if batch.error_file_id:
+            for line in self.openai_client.files.content(batch.error_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                result = json.loads(line)
+                error = result.get('error') or (result.get('response') or {}).get('body', {}).get('error')
+                self.logger.error(f"Batch request {result.get('custom_id')} failed: {error}")
+                error_count += 1
+                
+        if not batch.output_file_id:
+            raise RuntimeError(
+                f"Batch job {job['batch_id']} completed without any successful results "
+                f"({error_count} failed requests logged above); the existing index was left unchanged"
+            )
+            
+        # Parse results, keeping only successful responses
+        output = self.openai_client.files.content(batch.output_file_id).text
+        paths, hashes, vectors, tokens, file_stats = [], [], [], [], []
+        
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = json.loads(line)
+            entry = job['files'].get(result['custom_id'])
+            response = result.get('response') or {}
+            
+            if entry is None or response.get('status_code') != 200:
+                self.logger.error(f"Batch request {result['custom_id']} failed: {result.get('error')}")
+                continue
+                
+            body = response['body']
+            paths.append(entry['path'])
+            hashes.append(entry['content_hash'])
+            vectors.append(decode_embedding(body['data'][0]['embedding']))
+            tokens.append(body['usage']['total_tokens'])
+            file_stats.append((entry['size'], entry['mtime']))
+            
+        stats.total_files = len(job['files'])
+        stats.failed_files = stats.total_files - len(paths)
+        
+        # Replace the index with the batch results
+        self._initialize_empty_index()
+        
+        if paths:
+            embeddings = np.stack(vectors)
+            faiss.normalize_L2(embeddings)
+            costs = [t * 0.000065 / 1000 for t in tokens]  # Batch API is billed at half the sync rate
+            self._store_embeddings(paths, hashes, embeddings, tokens, costs, stats, file_stats)
+            
+        self._finalize_index()
+        self._save_data()
+        job_path.unlink()
+        
+        stats.end_time = time.time()
+        self._log_stats(stats, "Batch rebuild completed")
+        
         return stats
         
     def _log_stats(self, stats: IndexStats, message: str):
@@ -479,35 +1246,76 @@ class SemanticIndexer:
 
 
 class FileWatcher(FileSystemEventHandler):
-    """Watch for file changes and trigger incremental updates."""
+    """Watch for file changes and trigger incremental updates.
+    
+    Changed paths accumulate in pending_updates; a background thread flushes them
+    every debounce_seconds as one batch, so a burst of saves while editing becomes
+    a single embedding request instead of one per save.
+    """
     
     def __init__(self, indexer: SemanticIndexer):
         self.indexer = indexer
         self.debounce_seconds = indexer.config['indexing']['debounce_seconds']
         self.pending_updates = set()
-        self.last_update_time = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flush_thread.start()
         
     def on_modified(self, event):
-        if event.is_directory:
-            return
+        if not event.is_directory:
+            self._queue(event.src_path)
+            
+    def on_created(self, event):
+        self.on_modified(event)
+        
+    def on_moved(self, event):
+        # Syncthing and atomic-save editors write a temp file, then rename it onto the note
+        if not event.is_directory:
+            self._queue(event.dest_path)
             
-        file_path = event.src_path
-        if not file_path.endswith('.md'):
+    def _queue(self, file_path: str):
+        if not self.indexer._is_indexable(file_path):
             return
             
-        # Debounce rapid changes
-        current_time = time.time()
-        if file_path in self.last_update_time:
-            time_diff = current_time - self.last_update_time[file_path]
-            if time_diff < self.debounce_seconds:
-                return
-                
-        self.last_update_time[file_path] = current_time
-        self.pending_updates.add(file_path)
-        
-        # Trigger update after debounce period
-        # In a production system, you'd want a more sophisticated debounce mechanism
+        # Repeated saves within one debounce window collapse into a single entry
+        with self._lock:
+            self.pending_updates.add(file_path)
+            
         self.indexer.logger.info(f"File changed: {file_path}")
+        
+    def _flush_loop(self):
+        """Flush pending updates every debounce_seconds until stopped."""
+        while not self._stop.wait(self.debounce_seconds):
+            self.flush()
+            
+    def flush(self):
+        """Embed and save everything that changed since the last flush."""
+        with self._lock:
+            snapshot = sorted(self.pending_updates)
+            self.pending_updates.clear()
+            
+        # Files deleted or renamed away since the event have nothing to embed
+        snapshot = [file_path for file_path in snapshot if os.path.exists(file_path)]
+        if not snapshot:
+            return
+            
+        try:
+            stats = self.indexer._process_file_batch(snapshot, force_rebuild=False)
+            if stats.processed_files:
+                self.indexer._save_data()
+            self.indexer.logger.info(
+                f"Watch update: {stats.processed_files} embedded, {stats.skipped_files} unchanged, "
+                f"{stats.failed_files} failed"
+            )
+        except Exception as e:
+            self.indexer.logger.error(f"Watch update failed: {e}")
+            
+    def stop(self):
+        """Stop the flush thread, flushing anything still pending."""
+        self._stop.set()
+        self._flush_thread.join()
+        self.flush()
 
 
 def main():
@@ -515,23 +1323,32 @@ def main():
     parser.add_argument('--rebuild', action='store_true', help='Rebuild entire index')
     parser.add_argument('--update', action='store_true', help='Update changed files')
     parser.add_argument('--watch', action='store_true', help='Watch for changes')
+    parser.add_argument('--batch-api', action='store_true',
+                        help='With --rebuild, embed via the OpenAI Batch API (half price, slower)')
+    parser.add_argument('--resume-batch', action='store_true',
+                        help='Wait for a previously submitted batch job and ingest its results')
     parser.add_argument('--config', help='Config file path')
     
     args = parser.parse_args()
     
     try:
-        indexer = SemanticIndexer(args.config)
+        # A rebuild starts from an empty index, so skip reading the old one
+        indexer = SemanticIndexer(args.config, load_existing=not args.rebuild)
         
         if args.rebuild:
-            indexer.rebuild_index()
+            indexer.rebuild_index(use_batch_api=args.batch_api)
+        elif args.resume_batch:
+            indexer._resume_batch()
         elif args.update:
             indexer.update_index()
         elif args.watch:
+            indexer._check_dimensions()
             print("Watching for file changes... Press Ctrl+C to stop")
             observer = Observer()
+            watcher = FileWatcher(indexer)
             observer.schedule(
-                FileWatcher(indexer), 
-                indexer.config['vault']['path'], 
+                watcher, 
+                str(indexer.paths.vault), 
                 recursive=True
             )
             observer.start()
@@ -542,8 +1359,9 @@ def main():
             except KeyboardInterrupt:
                 observer.stop()
             observer.join()
+            watcher.stop()
         else:
-            print("Please specify --rebuild, --update, or --watch")
+            print("Please specify --rebuild, --update, --resume-batch, or --watch")
             
     except Exception as e:
         print(f"Error: {e}")
@@ -8,29 +8,118 @@ Usage:
     python3 semantic_query.py --text "decision making under uncertainty"
     python3 semantic_query.py --file "/path/to/note.md"
     python3 semantic_query.py --file "/path/to/note.md" --limit 5
+    python3 semantic_query.py --text "stoicism" --text "habit formation"
+    printf 'stoicism\nhabit formation\n' | python3 semantic_query.py
 """
 
+import io
 import os
+import sys
 import json
+import base64
+import hashlib
+import pickle
 import yaml
 import argparse
 import logging
+import re
 from pathlib import Path
-from typing import List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, List, Tuple, Optional, TextIO
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
 
 import numpy as np
 import faiss
+import msgpack
+import tiktoken
 from openai import OpenAI
 
+from query_input import read_query_texts
+
+try:
+    import orjson
+    _json_loads = orjson.loads  # C parser, several times faster on large files
+except ImportError:
+    _json_loads = json.loads
+
+# Vault root that relative paths are given against, resolved once at import
+_VAULT_ROOT = os.environ.get('FORGE') or os.path.expanduser('~/Forge')
+
+# YAML frontmatter block at the very start of a note
+_FRONTMATTER_RE = re.compile(r'\A---\s*\n.*?\n---\s*\n', re.DOTALL)
+
+def _read_head(file_path: str, nbytes: int = 4096) -> str:
+    """Read the start of a note: enough for its title and first paragraph.
+    
+    Falls back to the whole file when frontmatter doesn't close within nbytes,
+    since the prefix would then hold nothing but YAML.
+    """
+    with open(file_path, 'rb') as f:
+        data = f.read(nbytes)
+        head = data.decode('utf-8', 'ignore')
+        if len(data) == nbytes and head.startswith('---') and not _FRONTMATTER_RE.match(head):
+            data += f.read()
+            head = data.decode('utf-8', 'ignore')
+    return head
+
+def _get_file_metadata(file_path: str, max_bytes: int = 4096) -> Tuple[str, str]:
+    """Extract (title, snippet) from one read of the start of a file.
+    
+    The title is the first markdown heading in the first 10 lines (else the filename);
+    the snippet is the first paragraph, capped at 200 characters.
+    """
+    title = Path(file_path).stem
+    try:
+        content = _read_head(file_path, max_bytes)
+    except OSError:
+        return title, ""
+        
+    content = content.replace('\r\n', '\n')
+    if content.startswith('---'):
+        content = _FRONTMATTER_RE.sub('', content, count=1)
+    content = content.strip()
+    
+    # Look for first markdown heading
+    for line in content.splitlines()[:10]:
+        line = line.strip()
+        if line.startswith('#'):
+            title = line.lstrip('#').strip()
+            break
+            
+    # Simple snippet extraction - first paragraph, up to 200 chars. Content is
+    # stripped, so the first paragraph is non-empty and no others need splitting off
+    head = content.split('\n\n', 1)[0].strip()
+    snippet = head[:200] + ("..." if len(head) > 200 else "")
+    
+    return title, snippet
+
 @dataclass
 class SearchResult:
-    """A single search result with similarity and metadata."""
+    """A single search result with similarity and metadata.
+    
+    Title and snippet are read from the file on first access, so output formats
+    that don't show them never touch the file.
+    """
     file_path: str
     similarity: float
-    title: str = ""
-    snippet: str = ""
+    _metadata: Optional[Tuple[str, str]] = field(default=None, init=False, repr=False, compare=False)
     
+    @property
+    def _file_metadata(self) -> Tuple[str, str]:
+        # A plain attribute rather than functools.cached_property, whose lock (Python
+        # 3.11 and earlier) is shared by all instances and would serialize the prefetch
+        if self._metadata is None:
+            self._metadata = _get_file_metadata(self.file_path)
+        return self._metadata
+        
+    @property
+    def title(self) -> str:
+        return self._file_metadata[0]
+        
+    @property
+    def snippet(self) -> str:
+        return self._file_metadata[1]
+        
     @property
     def filename(self) -> str:
         return Path(self.file_path).stem
@@ -38,14 +127,7 @@ class SearchResult:
     @property
     def relative_path(self) -> str:
         """Path relative to vault root."""
-        try:
-            # Use environment variable or home directory for cross-platform compatibility
-            vault_root = os.environ.get('FORGE', os.path.expanduser('~/Forge'))
-            if not vault_root.endswith('/'):
-                vault_root += '/'
-            return os.path.relpath(self.file_path, vault_root)
-        except:
-            return self.file_path
+        return os.path.relpath(self.file_path, _VAULT_ROOT)
 
 class SemanticQuery:
     def __init__(self, config_path: str = None):
@@ -57,8 +139,13 @@ class SemanticQuery:
             self.config = yaml.safe_load(f)
             
         self._setup_logging()
-        self._setup_openai()
+        self.embedder = self.config.get('embedder', 'openai')
+        self.local_model = None  # Loaded on first use, only if a query misses the cache
+        self.encoder = None  # Loaded on first use, only for file searches with OpenAI
+        if self.embedder == 'openai':
+            self._setup_openai()
         self._load_index()
+        self._load_query_cache()
         
     def _setup_logging(self):
         """Setup logging configuration."""
@@ -74,28 +161,284 @@ class SemanticQuery:
         else:
             self.openai_client = OpenAI(api_key=api_key)
         
+    def _load_brute_force_matrix(self):
+        """For small flat indexes, keep the raw vectors to search with a single matmul.
+        
+        Below query.brute_force_max vectors, one BLAS call over the matrix is cheaper than
+        going through the FAISS index object.
+        """
+        self.xb = None
+        self.xb_ids = None
+        
+        flat_index, ids = self.index, None
+        if isinstance(flat_index, faiss.IndexIDMap):
+            ids = faiss.vector_to_array(flat_index.id_map)
+            flat_index = faiss.downcast_index(flat_index.index)
+        if not isinstance(flat_index, faiss.IndexFlat) or flat_index.metric_type != faiss.METRIC_INNER_PRODUCT:
+            return
+        if not 0 < flat_index.ntotal < self.config['query'].get('brute_force_max', 10000):
+            return
+            
+        self.xb = flat_index.reconstruct_n(0, flat_index.ntotal)
+        self.xb_ids = ids if ids is not None else np.arange(flat_index.ntotal, dtype=np.int64)
+        
+    def _search_index(self, query_embeddings: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the top-k (similarities, ids) for each query row, like index.search."""
+        if self.xb is None:
+            return self.index.search(query_embeddings, k)
+            
+        similarities = query_embeddings @ self.xb.T
+        if k < similarities.shape[1]:
+            # Partial sort: pick the k best per row, then order just those
+            top = np.argpartition(-similarities, k - 1, axis=1)[:, :k]
+            order = np.argsort(-np.take_along_axis(similarities, top, axis=1), axis=1)
+            top = np.take_along_axis(top, order, axis=1)
+        else:
+            top = np.argsort(-similarities, axis=1)
+        return np.take_along_axis(similarities, top, axis=1), self.xb_ids[top]
+        
+    def _get_local_model(self):
+        """Load the local sentence-transformers model (optional dependency)."""
+        if self.local_model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError:
+                raise ImportError("embedder: local requires sentence-transformers (pip install sentence-transformers)")
+            local_config = self.config.get('local', {})
+            kwargs = {'backend': local_config['backend']} if 'backend' in local_config else {}
+            self.local_model = SentenceTransformer(self._embedding_model_name(), **kwargs)
+        return self.local_model
+        
+    def _get_encoder(self):
+        """Load the tiktoken encoding for the configured OpenAI model."""
+        if self.encoder is None:
+            self.encoder = tiktoken.encoding_for_model(self.config['openai']['model'])
+        return self.encoder
+        
+    def _embedding_model_name(self) -> str:
+        if self.embedder == 'local':
+            return self.config.get('local', {}).get('model', 'all-MiniLM-L6-v2')
+        return self.config['openai']['model']
+        
     def _load_index(self):
         """Load FAISS index and metadata."""
         index_path = os.path.expanduser(self.config['database']['index_path'])
         metadata_path = os.path.expanduser(self.config['database']['metadata_path'])
+        if not os.path.exists(metadata_path):
+            # Fall back to metadata written as JSON by older indexer versions
+            legacy_path = os.path.splitext(metadata_path)[0] + '.json'
+            if os.path.exists(legacy_path):
+                metadata_path = legacy_path
         
         if not os.path.exists(index_path) or not os.path.exists(metadata_path):
             raise FileNotFoundError(
                 "Index not found. Run 'semantic_indexer.py --rebuild' first."
             )
             
-        # Load FAISS index
-        self.index = faiss.read_index(index_path)
+        # Memory-map the FAISS index: the OS pages in only what searches touch,
+        # instead of reading the whole file up front
+        try:
+            self.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            # Older FAISS builds can't map every index type
+            self.index = faiss.read_index(index_path)
+        
+        # IVF indexes only scan nprobe inverted lists per query: higher is more accurate but slower
+        try:
+            faiss.extract_index_ivf(self.index).nprobe = self.config.get('index', {}).get('nprobe', 16)
+        except RuntimeError:
+            pass  # Flat index, nothing to tune
+        
+        # HNSW explores efSearch candidates per query: higher is more accurate but slower
+        hnsw_index = self.index
+        if isinstance(hnsw_index, faiss.IndexIDMap):
+            hnsw_index = faiss.downcast_index(hnsw_index.index)
+        if hasattr(hnsw_index, 'hnsw'):
+            hnsw_index.hnsw.efSearch = self.config['query'].get('ef_search', 16)
+        
+        self._maybe_move_to_gpu()
         
-        # Load metadata
-        with open(metadata_path, 'r') as f:
-            metadata_dict = json.load(f)
-            self.file_paths = metadata_dict['file_paths']
+        self._load_brute_force_matrix()
+        
+        self.file_paths = self._load_file_paths(metadata_path)
             
         self.logger.info(f"Loaded index with {self.index.ntotal} vectors")
         
+    def _load_file_paths(self, metadata_path: str) -> List[Optional[str]]:
+        """Load the vector id -> path list from the index metadata.
+        
+        Queries only need file_paths, not the per-file change-tracking columns, so the
+        list is also pickled to the cache directory and reused until the metadata file's
+        mtime or size changes.
+        """
+        stat = os.stat(metadata_path)
+        source = [stat.st_mtime_ns, stat.st_size]
+        cache_path = os.path.join(os.path.expanduser(self.config['database']['cache_path']), 'file_paths.pkl')
+        
+        try:
+            with open(cache_path, 'rb') as f:
+                cached = pickle.load(f)
+            if cached['source'] == source:
+                return cached['file_paths']
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError):
+            pass  # Missing or unreadable cache; parse the metadata below
+            
+        # Load metadata (msgpack, or JSON from older indexer versions)
+        with open(metadata_path, 'rb') as f:
+            data = f.read()
+        metadata_dict = _json_loads(data) if data.lstrip()[:1] == b'{' else msgpack.unpackb(data)
+        file_paths = metadata_dict['file_paths']
+        
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            temp_path = cache_path + '.tmp'
+            with open(temp_path, 'wb') as f:
+                pickle.dump({'source': source, 'file_paths': file_paths}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, cache_path)
+        except OSError as e:
+            self.logger.warning(f"Failed to cache file paths: {e}")
+            
+        return file_paths
+        
+    def _load_query_cache(self):
+        """Load embeddings of earlier text queries, so repeating a query skips the API call.
+        
+        query_cache.bin is an append-only file of fixed-size records, each a hash of the
+        whitespace-normalized query text followed by its vector, so a miss appends one
+        record instead of rewriting the cache. query_cache.json records the model and
+        dimensions, and the cache is dropped when either changes.
+        """
+        cache_dir = os.path.expanduser(self.config['database']['cache_path'])
+        self.query_cache_path = os.path.join(cache_dir, 'query_cache.bin')
+        self.query_cache_info_path = os.path.join(cache_dir, 'query_cache.json')
+        self.query_cache_info = {'model': self._embedding_model_name(), 'dimensions': self.index.d}
+        self.query_cache_dtype = np.dtype([('key', 'S40'), ('vector', '<f4', (self.index.d,))])
+        # Oldest first; a query embedded again moves to the end
+        self.query_cache: Dict[str, np.ndarray] = {}
+        # Records in query_cache.bin, or None if it has to be rewritten before appending
+        self.query_cache_records = None
+        
+        try:
+            with open(self.query_cache_info_path, 'rb') as f:
+                if _json_loads(f.read()) != self.query_cache_info:
+                    return
+            # Ignore a partly written last record
+            count = os.path.getsize(self.query_cache_path) // self.query_cache_dtype.itemsize
+            records = np.fromfile(self.query_cache_path, dtype=self.query_cache_dtype, count=count)
+        except (OSError, ValueError):
+            return  # No usable cache yet
+            
+        for key, vector in zip(records['key'], records['vector']):
+            key = key.decode('ascii')
+            self.query_cache.pop(key, None)
+            self.query_cache[key] = vector
+        self.query_cache_records = len(records)
+        
+    @staticmethod
+    def _query_cache_key(text: str) -> str:
+        return hashlib.sha1(' '.join(text.split()).encode('utf-8')).hexdigest()
+        
+    def _save_query_cache(self, keys: List[str], embeddings: np.ndarray):
+        """Add query embeddings to the cache, keeping the newest query.cache_size.
+        
+        New records are appended; once the file holds twice query.cache_size records it
+        is rewritten with just the newest, so each miss costs amortized O(1) writes.
+        """
+        for key, embedding in zip(keys, embeddings):
+            self.query_cache.pop(key, None)
+            self.query_cache[key] = embedding
+            
+        cache_size = self.config['query'].get('cache_size', 1000)
+        try:
+            if self.query_cache_records is not None and self.query_cache_records + len(keys) <= 2 * cache_size:
+                records = np.empty(len(keys), dtype=self.query_cache_dtype)
+                records['key'] = [key.encode('ascii') for key in keys]
+                records['vector'] = embeddings
+                with open(self.query_cache_path, 'ab') as f:
+                    f.write(records.tobytes())
+                self.query_cache_records += len(records)
+                return
+                
+            # Evict the oldest and rewrite the file from scratch
+            for key in list(self.query_cache)[:max(len(self.query_cache) - cache_size, 0)]:
+                del self.query_cache[key]
+            records = np.empty(len(self.query_cache), dtype=self.query_cache_dtype)
+            records['key'] = [key.encode('ascii') for key in self.query_cache]
+            if self.query_cache:
+                records['vector'] = np.stack(list(self.query_cache.values()))
+                
+            os.makedirs(os.path.dirname(self.query_cache_path), exist_ok=True)
+            temp_path = self.query_cache_path + '.tmp'
+            records.tofile(temp_path)
+            os.replace(temp_path, self.query_cache_path)
+            with open(self.query_cache_info_path, 'w') as f:
+                json.dump(self.query_cache_info, f)
+            self.query_cache_records = len(records)
+            
+            # Drop the whole-file FAISS cache written by earlier versions
+            legacy_path = os.path.join(os.path.dirname(self.query_cache_path), 'query_cache.faiss')
+            if os.path.exists(legacy_path):
+                os.remove(legacy_path)
+        except OSError as e:
+            self.logger.warning(f"Failed to save query cache: {e}")
+            
+    def _maybe_move_to_gpu(self):
+        """Move the index to GPU per database.use_gpu: auto (large indexes only), true, or false.
+        
+        A GPU only pays off once the index is big enough to amortize the transfer,
+        so auto waits for query.gpu_threshold vectors.
+        """
+        use_gpu = self.config['database'].get('use_gpu', 'auto')
+        if use_gpu is False or not hasattr(faiss, 'StandardGpuResources') or faiss.get_num_gpus() == 0:
+            return
+        if use_gpu == 'auto' and self.index.ntotal <= self.config['query'].get('gpu_threshold', 50000):
+            return
+            
+        try:
+            self.gpu_resources = faiss.StandardGpuResources()
+            self.index = faiss.index_cpu_to_gpu(self.gpu_resources, 0, self.index)
+            self.logger.info("Moved index to GPU")
+        except RuntimeError as e:
+            # e.g. HNSW has no GPU implementation
+            self.logger.warning(f"Keeping index on CPU: {e}")
+            
     def _get_embedding(self, text: str) -> Optional[np.ndarray]:
-        """Get embedding for query text."""
+        """Get embedding for query text, from the query cache when it has been seen before."""
+        embeddings = self._get_query_embeddings([text])
+        return None if embeddings is None else embeddings[0]
+        
+    def _get_query_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Get embeddings for query texts as an (n, d) matrix, embedding cache misses in one call."""
+        cache_keys = [self._query_cache_key(text) for text in texts]
+        embeddings = np.empty((len(texts), self.index.d), dtype=np.float32)
+        
+        # Texts not in the cache, each embedded once even if repeated
+        missing = {}
+        for i, cache_key in enumerate(cache_keys):
+            cached = self.query_cache.get(cache_key)
+            if cached is not None:
+                embeddings[i] = cached
+            else:
+                missing.setdefault(cache_key, []).append(i)
+                
+        if missing:
+            new_embeddings = self._get_embeddings([texts[rows[0]] for rows in missing.values()])
+            if new_embeddings is None:
+                return None
+                
+            for rows, embedding in zip(missing.values(), new_embeddings):
+                embeddings[rows] = embedding
+            self._save_query_cache(list(missing), new_embeddings)
+            
+        return embeddings
+        
+    def _get_embeddings(self, texts: List[str]) -> Optional[np.ndarray]:
+        """Embed several texts in one call, returning normalized vectors as an (n, d) matrix."""
+        if self.embedder == 'local':
+            return self._get_local_model().encode(
+                texts, normalize_embeddings=True, convert_to_numpy=True
+            ).astype(np.float32)
+            
         if self.openai_client is None:
             print("❌ Semantic search unavailable: OpenAI API key not configured")
             print("💡 To enable semantic search, set your OpenAI API key:")
@@ -103,17 +446,23 @@ class SemanticQuery:
             return None
             
         try:
+            # Ask for vectors the same size as the index was built with
             response = self.openai_client.embeddings.create(
-                input=text,
-                model=self.config['openai']['model']
+                input=texts,
+                model=self.config['openai']['model'],
+                dimensions=self.index.d,
+                encoding_format="base64"
             )
             
-            embedding = np.array(response.data[0].embedding, dtype=np.float32)
+            # base64 decodes straight into a float32 buffer, no list of Python floats
+            embeddings = np.stack([
+                np.frombuffer(base64.b64decode(item.embedding), dtype=np.float32) for item in response.data
+            ])
             
-            # Normalize for cosine similarity
-            embedding = embedding / np.linalg.norm(embedding)
+            # Normalize in place for cosine similarity, all rows in one call
+            faiss.normalize_L2(embeddings)
             
-            return embedding
+            return embeddings
             
         except Exception as e:
             self.logger.error(f"Failed to get embedding: {e}")
@@ -126,8 +475,8 @@ class SemanticQuery:
                 content = f.read()
                 
             # Remove frontmatter like the indexer does
-            import re
-            content = re.sub(r'^---\s*\n.*?\n---\s*\n', '', content, flags=re.MULTILINE | re.DOTALL)
+            if content.startswith('---'):
+                content = _FRONTMATTER_RE.sub('', content, count=1)
             
             return content.strip()
             
@@ -135,49 +484,80 @@ class SemanticQuery:
             self.logger.error(f"Failed to read {file_path}: {e}")
             return ""
             
-    def _get_file_title(self, file_path: str) -> str:
-        """Extract title from file (first heading or filename)."""
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-                
-            # Look for first markdown heading
-            for line in lines[:10]:  # Check first 10 lines
-                line = line.strip()
-                if line.startswith('#'):
-                    return line.lstrip('#').strip()
-                    
-            # Fallback to filename
-            return Path(file_path).stem
-            
-        except:
-            return Path(file_path).stem
-            
-    def _get_file_snippet(self, file_path: str, query_text: str = "") -> str:
-        """Extract a relevant snippet from the file."""
-        try:
-            content = self._extract_file_content(file_path)
+    def _chunk_tokens(self, content: str) -> List[str]:
+        """Split content into windows that fit the embedding model, overlapping by an eighth.
+        
+        OpenAI models get 512-token windows counted with tiktoken; a local model gets
+        windows of its own max_seq_length, counted with its own tokenizer, since it
+        silently drops anything past that.
+        """
+        if self.embedder == 'local':
+            model = self._get_local_model()
+            tokenizer = model.tokenizer
+            tokens = tokenizer.encode(content, add_special_tokens=False)
+            decode = tokenizer.decode
+            size = model.max_seq_length - 2  # Room for the [CLS] and [SEP] tokens
+        else:
+            encoder = self._get_encoder()
+            tokens = encoder.encode(content, disallowed_special=())
+            decode = encoder.decode
+            size = 512
+            
+        if len(tokens) <= size:
+            return [content]
             
-            if not content:
-                return ""
+        step = size - size // 8
+        return [decode(tokens[start:start + size]) for start in range(0, len(tokens) - (size - step), step)]
+        
+    def _search_embeddings(self, query_embeddings: np.ndarray, limit: int) -> List[SearchResult]:
+        """Search with one or more query vectors in one batched FAISS call.
+        
+        A file matched by several query vectors is ranked by its best similarity.
+        """
+        similarities, indices = self._search_index(query_embeddings, self._candidate_k(limit))
+        return self._rank_results(similarities, indices, limit)
+        
+    def _candidate_k(self, limit: int) -> int:
+        """How many hits to ask FAISS for to fill `limit` results.
+        
+        A high threshold discards most hits anyway, so ask for just `limit`. Otherwise,
+        ask for some spare hits to cover replaced vectors and files matched more than once.
+        No need to clamp to ntotal: FAISS pads missing hits with id -1, which are skipped.
+        """
+        if self.config['query']['similarity_threshold'] >= 0.8:
+            return limit
+        return limit * 3
+        
+    def _rank_results(self, similarities: np.ndarray, indices: np.ndarray, limit: int) -> List[SearchResult]:
+        """Turn FAISS hits into results above the threshold, one per file at its best similarity."""
+        threshold = self.config['query']['similarity_threshold']
+        best = {}
+        
+        # Drop hits below the threshold, FAISS's -1 padding, and rows past the end of
+        # file_paths (legacy indexes that gained duplicate rows) before the Python loop
+        keep = (similarities >= threshold) & (indices >= 0) & (indices < len(self.file_paths))
+        
+        for similarity, idx in zip(similarities[keep], indices[keep]):
+            # Vectors replaced by a later update map to None
+            file_path = self.file_paths[idx]
+            if file_path is None:
+                continue
                 
-            # Simple snippet extraction - first paragraph or first 200 chars
-            paragraphs = [p.strip() for p in content.split('\n\n') if p.strip()]
-            
-            if paragraphs:
-                snippet = paragraphs[0]
-                if len(snippet) > 200:
-                    snippet = snippet[:200] + "..."
-                return snippet
-            else:
-                content = content.replace('\n', ' ')
-                if len(content) > 200:
-                    return content[:200] + "..."
-                return content
+            if similarity > best.get(file_path, -np.inf):
+                best[file_path] = similarity
                 
-        except:
-            return ""
+        # Build results, best first
+        results = []
+        for file_path, similarity in sorted(best.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            result = SearchResult(
+                file_path=file_path,
+                similarity=float(similarity)
+            )
+            
+            results.append(result)
             
+        return results
+        
     def search_by_text(self, query_text: str, limit: int = None) -> List[SearchResult]:
         """Search for notes similar to given text query."""
         if limit is None:
@@ -188,85 +568,122 @@ class SemanticQuery:
         if query_embedding is None:
             return []
             
-        # Search FAISS index
-        similarities, indices = self.index.search(
-            query_embedding.reshape(1, -1), 
-            min(limit, self.index.ntotal)
-        )
+        return self._search_embeddings(query_embedding[None, :], limit)
         
-        # Build results
-        results = []
-        threshold = self.config['query']['similarity_threshold']
+    def search_by_texts(self, query_texts: List[str], limit: int = None) -> List[List[SearchResult]]:
+        """Search for several text queries at once, returning one result list per query.
         
-        for similarity, idx in zip(similarities[0], indices[0]):
-            if similarity < threshold:
-                continue
-                
-            file_path = self.file_paths[idx]
-            
-            result = SearchResult(
-                file_path=file_path,
-                similarity=float(similarity),
-                title=self._get_file_title(file_path),
-                snippet=self._get_file_snippet(file_path, query_text)
-            )
+        All queries share one embedding call and one batched FAISS search.
+        """
+        if limit is None:
+            limit = self.config['query']['max_results']
             
-            results.append(result)
+        query_embeddings = self._get_query_embeddings(query_texts)
+        if query_embeddings is None:
+            return [[] for _ in query_texts]
             
-        return results
+        similarities, indices = self._search_index(query_embeddings, self._candidate_k(limit))
+        return [
+            self._rank_results(similarities[i:i + 1], indices[i:i + 1], limit)
+            for i in range(len(query_texts))
+        ]
         
     def search_by_file(self, file_path: str, limit: int = None) -> List[SearchResult]:
-        """Search for notes similar to given file."""
+        """Search for notes similar to given file.
+        
+        Long notes are embedded as overlapping chunks sized to the embedding model (one API
+        call for all of them), so a match on any part of the note counts rather than one
+        diluted whole-note vector.
+        """
+        if limit is None:
+            limit = self.config['query']['max_results']
+            
         content = self._extract_file_content(file_path)
         if not content:
             return []
             
-        return self.search_by_text(content, limit)
+        # Embedded directly rather than through the query cache, which is kept for
+        # typed queries that recur; note bodies would only evict them
+        query_embeddings = self._get_embeddings(self._chunk_tokens(content))
+        if query_embeddings is None:
+            return []
+            
+        return self._search_embeddings(query_embeddings, limit)
         
-    def format_results(self, results: List[SearchResult], query_desc: str) -> str:
-        """Format search results for display."""
+    def write_search(self, texts: List[str] = None, file: str = None, limit: int = None, out: TextIO = None):
+        """Run one command-line search (by text, else by file) and write its formatted output.
+        
+        Several texts are searched together and their result blocks separated by a blank line.
+        """
+        if out is None:
+            out = sys.stdout
+            
+        if texts and len(texts) > 1:
+            for i, (text, results) in enumerate(zip(texts, self.search_by_texts(texts, limit))):
+                if i:
+                    out.write("\n")
+                self.write_results(results, f'"{text}"', out)
+            return
+            
+        if texts:
+            results = self.search_by_text(texts[0], limit)
+            query_desc = f'"{texts[0]}"'
+        else:
+            results = self.search_by_file(file, limit)
+            query_desc = f'file: {os.path.basename(file)}'
+            
+        self.write_results(results, query_desc, out)
+        
+    def write_results(self, results: List[SearchResult], query_desc: str, out: TextIO = None):
+        """Write search results for display, a line at a time, to out (default stdout)."""
+        if out is None:
+            out = sys.stdout
+            
         if not results:
-            return f"No results found for: {query_desc}"
+            out.write(f"No results found for: {query_desc}\n")
+            return
             
-        output = []
-        output.append(f"Results for: {query_desc}")
-        output.append("─" * 80)
+        detailed = self.config['query']['result_format'] == 'detailed'
+        if detailed and len(results) > 1:
+            # Reading snippets is independent per file, so overlap the reads
+            with ThreadPoolExecutor(max_workers=min(8, len(results))) as executor:
+                list(executor.map(lambda result: result.snippet, results))
+                
+        out.write(f"Results for: {query_desc}\n")
+        out.write("─" * 80 + "\n")
         
         for result in results:
-            output.append(f"{result.similarity:.2f}  {result.filename}")
+            out.write(f"{result.similarity:.2f}  {result.filename}\n")
             
-            if self.config['query']['result_format'] == 'detailed':
+            if detailed:
                 if result.snippet:
                     snippet_lines = result.snippet.replace('\n', ' ')[:100]
-                    output.append(f"      {snippet_lines}")
-                output.append("")  # Empty line between detailed results
+                    out.write(f"      {snippet_lines}\n")
+                out.write("\n")  # Empty line between detailed results
                 
-        return "\n".join(output)
+    def format_results(self, results: List[SearchResult], query_desc: str) -> str:
+        """Format search results for display."""
+        buffer = io.StringIO()
+        self.write_results(results, query_desc, buffer)
+        return buffer.getvalue()[:-1]
 
-def main():
+def main(argv: List[str] = None):
     parser = argparse.ArgumentParser(description='Semantic Note Search')
-    parser.add_argument('--text', help='Search by text query')
+    parser.add_argument('--text', action='append', help='Search by text query (repeatable; "-" reads queries from stdin)')
     parser.add_argument('--file', help='Search by file similarity')
     parser.add_argument('--limit', type=int, help='Maximum number of results')
     parser.add_argument('--config', help='Config file path')
     
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    texts = read_query_texts(args.text, args.file)
     
-    if not args.text and not args.file:
+    if not texts and not args.file:
         print("Please specify either --text or --file")
         return 1
         
     try:
         query = SemanticQuery(args.config)
-        
-        if args.text:
-            results = query.search_by_text(args.text, args.limit)
-            query_desc = f'"{args.text}"'
-        else:
-            results = query.search_by_file(args.file, args.limit)
-            query_desc = f'file: {os.path.basename(args.file)}'
-            
-        print(query.format_results(results, query_desc))
+        query.write_search(texts, args.file, args.limit)
         
     except Exception as e:
         print(f"Error: {e}")
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Semantic Query Daemon
+
+Keeps a loaded SemanticQuery (config, FAISS index, metadata, API client) in memory
+behind a unix socket, so repeated searches skip Python startup, heavy imports and
+index loading. Run without --serve it is a thin client taking the same arguments
+as semantic_query.py: it forwards the search to the daemon for that config,
+starting one if none is running, and prints the daemon's output. If the daemon
+can't be reached it runs the search in-process instead.
+
+The daemon exits after query.daemon_idle_seconds without requests, and reloads
+when the config, index or metadata files change. Each request carries the client's
+OPENAI_API_KEY, and what the search prints or logs is sent back to the client.
+
+Usage:
+    python3 semantic_query_server.py --text "decision making under uncertainty"
+    python3 semantic_query_server.py --file "/path/to/note.md" --limit 5
+    python3 semantic_query_server.py --text "stoicism" --text "habit formation"
+    python3 semantic_query_server.py --no-daemon --text "..."   # always in-process
+    python3 semantic_query_server.py --serve [--config path]    # run the daemon itself
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import signal
+import logging
+import contextlib
+import socket
+import hashlib
+import argparse
+import tempfile
+import subprocess
+import socketserver
+
+from query_input import read_query_texts
+
+try:
+    import orjson
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    _json_loads = json.loads
+
+DEFAULT_CONFIG_PATH = os.path.expanduser("~/.local/share/semantic-search/config.yaml")
+
+# How long a client waits for a freshly spawned daemon to start listening
+SPAWN_TIMEOUT_SECONDS = 10
+
+# How long a client waits for a search result (index load + embedding call)
+REQUEST_TIMEOUT_SECONDS = 120
+
+def socket_path(config_path: str) -> str:
+    """Socket for the daemon serving config_path, in a directory only this user can access."""
+    socket_dir = os.path.join(tempfile.gettempdir(), f"semantic-search-{os.getuid()}")
+    os.makedirs(socket_dir, mode=0o700, exist_ok=True)
+    
+    # Refuse a directory someone else created or opened up
+    stat = os.lstat(socket_dir)
+    if stat.st_uid != os.getuid() or stat.st_mode & 0o077:
+        raise PermissionError(f"Unsafe socket directory: {socket_dir}")
+    
+    config_hash = hashlib.sha1(config_path.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(socket_dir, f"query-{config_hash}.sock")
+
+class QueryServer(socketserver.UnixStreamServer):
+    """Serves one search per connection from a single in-memory SemanticQuery."""
+    
+    def __init__(self, path: str, config_path: str):
+        self.config_path = config_path
+        self.query = None
+        self.loaded_stamp = None
+        self.api_key = os.environ.get('OPENAI_API_KEY')
+        self.idle = False
+        super().__init__(path, QueryHandler)
+    
+    def _stamp(self) -> tuple:
+        """Modification times of the files a loaded SemanticQuery depends on."""
+        paths = [self.config_path]
+        if self.query is not None:
+            database = self.query.config['database']
+            paths += [os.path.expanduser(database['index_path']), os.path.expanduser(database['metadata_path'])]
+        stamp = []
+        for path in paths:
+            try:
+                stamp.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+    
+    def get_query(self, api_key: str = None):
+        """Return the SemanticQuery, reloading it if the indexer or config changed since.
+        
+        api_key is the requesting client's OPENAI_API_KEY; a different one (set, rotated
+        or unset since) replaces the key the daemon was started with.
+        """
+        if api_key != self.api_key:
+            if api_key:
+                os.environ['OPENAI_API_KEY'] = api_key
+            else:
+                os.environ.pop('OPENAI_API_KEY', None)
+            self.api_key = api_key
+            if self.query is not None and self.query.embedder == 'openai':
+                self.query._setup_openai()
+                
+        if self.query is None or self._stamp() != self.loaded_stamp:
+            from semantic_query import SemanticQuery
+            self.query = None
+            self.query = SemanticQuery(self.config_path)
+            self.loaded_stamp = self._stamp()
+        return self.query
+    
+    def handle_timeout(self):
+        self.idle = True
+
+class QueryHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        request = _json_loads(self.rfile.readline())
+        
+        # The daemon's own stdout/stderr go nowhere, so collect what the search prints
+        # (stdout) and logs (stderr) for this request and send it back with the results
+        buffer = io.StringIO()
+        errors = io.StringIO()
+        log_handler = logging.StreamHandler(errors)
+        log_handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+        logger = logging.getLogger('SemanticQuery')
+        logger.addHandler(log_handler)
+        try:
+            with contextlib.redirect_stdout(buffer):
+                query = self.server.get_query(request.get('api_key'))
+                query.write_search(request.get('texts'), request.get('file'), request.get('limit'), buffer)
+            status = 0
+        except Exception as e:
+            buffer.write(f"Error: {e}\n")
+            status = 1
+        finally:
+            logger.removeHandler(log_handler)
+            
+        response = {'output': buffer.getvalue(), 'errors': errors.getvalue(), 'status': status}
+        self.wfile.write(_json_dumps(response) + b'\n')
+
+def serve(config_path: str):
+    """Run the daemon for config_path until it has been idle for query.daemon_idle_seconds."""
+    import yaml
+    
+    path = socket_path(config_path)
+    
+    # Another daemon may already own the socket; only take over a stale one
+    if os.path.exists(path):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+                probe.connect(path)
+            return
+        except OSError:
+            os.unlink(path)
+    
+    with open(config_path, 'r') as f:
+        config = yaml.safe_load(f)
+    
+    # Listen straight away; the index is loaded by the first request, so that request
+    # gets whatever loading prints or logs (e.g. a missing API key)
+    server = QueryServer(path, config_path)
+    os.chmod(path, 0o600)
+    server.timeout = config['query'].get('daemon_idle_seconds', 900)
+    
+    # Exit through the finally below on kill, so the socket file is removed
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    
+    try:
+        while not server.idle:
+            server.handle_request()
+    finally:
+        server.server_close()
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+def _spawn_server(config_path: str):
+    subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', '--config', config_path],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True
+    )
+
+def request_search(config_path: str, texts: list = None, file: str = None, limit: int = None):
+    """Send a search to the daemon (spawning it if needed).
+    
+    Returns (output, errors, status) -- the search's stdout, its log messages and exit
+    status -- or None if the daemon is unreachable.
+    """
+    try:
+        path = socket_path(config_path)
+    except OSError:
+        return None
+    
+    request = {'texts': texts, 'file': file, 'limit': limit, 'api_key': os.environ.get('OPENAI_API_KEY')}
+    payload = _json_dumps(request) + b'\n'
+    deadline = None
+    
+    while True:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(path)
+                sock.settimeout(REQUEST_TIMEOUT_SECONDS)
+                sock.sendall(payload)
+                with sock.makefile('rb') as reply:
+                    response = _json_loads(reply.readline())
+            return response['output'], response['errors'], response['status']
+        
+        except (FileNotFoundError, ConnectionRefusedError):
+            # No daemon yet: start one, then retry until it is listening
+            if deadline is None:
+                _spawn_server(config_path)
+                deadline = time.monotonic() + SPAWN_TIMEOUT_SECONDS
+            elif time.monotonic() > deadline:
+                return None
+            time.sleep(0.05)
+        
+        except (OSError, ValueError, KeyError):
+            return None
+
+def main():
+    parser = argparse.ArgumentParser(description='Semantic Note Search (daemon client)')
+    parser.add_argument('--text', action='append', help='Search by text query (repeatable; "-" reads queries from stdin)')
+    parser.add_argument('--file', help='Search by file similarity')
+    parser.add_argument('--limit', type=int, help='Maximum number of results')
+    parser.add_argument('--config', help='Config file path')
+    parser.add_argument('--no-daemon', action='store_true', help='Search in-process without the daemon')
+    parser.add_argument('--serve', action='store_true', help='Run the daemon')
+    
+    args = parser.parse_args()
+    config_path = os.path.abspath(os.path.expanduser(args.config or DEFAULT_CONFIG_PATH))
+    
+    if args.serve:
+        serve(config_path)
+        return 0
+    
+    texts = read_query_texts(args.text, args.file)
+    if not texts and not args.file:
+        print("Please specify either --text or --file")
+        return 1
+    
+    if not args.no_daemon:
+        # The daemon has its own working directory, so send it an absolute path
+        file_path = os.path.abspath(args.file) if args.file else None
+        response = request_search(config_path, texts, file_path, args.limit)
+        if response is not None:
+            output, errors, status = response
+            sys.stderr.write(errors)
+            sys.stdout.write(output)
+            return status
+    
+    # Fall back to searching in this process; stdin is already consumed, so pass the texts on
+    import semantic_query
+    argv = ['--config', config_path]
+    for text in texts:
+        argv += ['--text', text]
+    if args.file:
+        argv += ['--file', args.file]
+    if args.limit is not None:
+        argv += ['--limit', str(args.limit)]
+    return semantic_query.main(argv)
+
+if __name__ == '__main__':
+    exit(main())
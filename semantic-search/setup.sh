@@ -21,11 +21,14 @@ fi
 # Install/update dependencies
 echo "📚 Installing Python dependencies..."
 "$VENV_DIR/bin/pip" install --upgrade pip
-"$VENV_DIR/bin/pip" install openai faiss-cpu numpy pandas pyyaml tqdm watchdog
+"$VENV_DIR/bin/pip" install openai faiss-cpu numpy pandas pyyaml tqdm watchdog xxhash msgpack tiktoken
+# Optional, for embedder: local in config.yaml:
+#   "$VENV_DIR/bin/pip" install sentence-transformers
 
 # Make scripts executable
 chmod +x "$SCRIPT_DIR/semantic_indexer.py"
 chmod +x "$SCRIPT_DIR/semantic_query.py"
+chmod +x "$SCRIPT_DIR/semantic_query_server.py"
 
 # Check for OpenAI API key
 if [[ -z "$OPENAI_API_KEY" ]]; then